@@ -41,7 +41,7 @@ def run_inversion(
                     be stored as a single ark, scp or ark-like txt file,
                     or as npy files in a given folder
     inverter      : NeuralNetwork-inheriting instance, or path to
-                    a .npy file recording a dumped model of such kind
+                    a .npz file recording a dumped model of such kind
     destination   : path where to output the inverted features, which
                     may be written as .npy files in a given folder or
                     compiled in a .ark, .scp or ark-like .txt file
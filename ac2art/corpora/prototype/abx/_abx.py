@@ -20,7 +20,10 @@
 """Wrappers to design corpus-specific functions to run ABXpy tasks."""
 
 import os
+import concurrent.futures
+import csv
 import functools
+import itertools
 
 import h5features as h5f
 import pandas as pd
@@ -41,9 +44,9 @@ def build_h5features_extractor(corpus):
     """
     # Load dependency path and functions.
     abx_folder = os.path.join(CONSTANTS['%s_processed_folder' % corpus], 'abx')
-    load_acoustic, load_ema, get_utterances = import_from_string(
+    load_acoustic, get_utterances = import_from_string(
         'ac2art.corpora.%s.load._load' % corpus,
-        ['load_acoustic', 'load_ema', 'get_utterances']
+        ['load_acoustic', 'get_utterances']
     )
     # Define features extraction functions.
 
@@ -53,58 +56,42 @@ def build_h5features_extractor(corpus):
         """Build a function to load features associated with an utterance.
 
         See `extract_h5_features` documentation for arguments.
+
+        Unless an inverter is used, the returned loader is picklable,
+        and may thus be run in separate processes.
         """
-        nonlocal load_acoustic, load_ema
+        nonlocal corpus, load_acoustic
         # Check that provided arguments make sense.
         if audio_features is None and ema_features is None:
             raise RuntimeError('No features were set to be included.')
-        if inverter is not None:
-            check_type_validity(inverter, (NeuralNetwork, None), 'inverter')
-            if audio_features is None:
-                raise RuntimeError(
-                    'No acoustic features specified to feed the inverter.'
-                )
-            elif ema_features is not None:
-                raise RuntimeError(
-                    'Both ema features and an inverter were specified.'
-                )
-        # Build the acoustic features loading function.
-        if audio_features is not None:
-            window = (
-                0 if inverter is None or inverter.input_shape[-1] % 11 else 5
-            )
-            load_audio = functools.partial(
-                load_acoustic, audio_type=audio_features, context_window=window
+        if inverter is None:
+            return FeaturesLoader(
+                corpus, audio_features, ema_features, dynamic_ema, articulators
             )
-            # Optionally build and return an inverter-based features loader.
-            if inverter is not None:
-                def invert_features(utterance):
-                    """Return the features inverted from an utterance."""
-                    pred = inverter.predict(load_audio(utterance))
-                    return pred
-                return invert_features
-            if ema_features is None:
-                return load_audio
-        # Build the articulatory features loading function.
-        if ema_features is not None:
-            load_articulatory = functools.partial(
-                load_ema, norm_type=ema_features, use_dynamic=dynamic_ema,
-                articulators=articulators
+        check_type_validity(inverter, NeuralNetwork, 'inverter')
+        if audio_features is None:
+            raise RuntimeError(
+                'No acoustic features specified to feed the inverter.'
             )
-            if audio_features is None:
-                return load_articulatory
-        # When appropriate, build a global features loading function.
-        def load_features(utterance):
-            """Load the features associated with an utterance."""
-            return np.concatenate(
-                [load_audio(utterance), load_articulatory(utterance)], axis=1
+        elif ema_features is not None:
+            raise RuntimeError(
+                'Both ema features and an inverter were specified.'
             )
-        return load_features
+        # Build and return an inverter-based features loader.
+        window = 0 if inverter.input_shape[-1] % 11 else 5
+        load_audio = functools.partial(
+            load_acoustic, audio_type=audio_features, context_window=window
+        )
+        def invert_features(utterance):
+            """Return the features inverted from an utterance."""
+            pred = inverter.predict(load_audio(utterance))
+            return pred
+        return invert_features
 
     def extract_h5_features(
             audio_features=None, ema_features=None, inverter=None,
             output_name='%s_features' % corpus, articulators=None,
-            dynamic_ema=True, sampling_rate=100
+            dynamic_ema=True, sampling_rate=100, n_jobs=1
         ):
         """Build an h5 file recording audio features associated with {0} data.
 
@@ -119,9 +106,13 @@ def build_h5features_extractor(corpus):
         dynamic_ema    : whether to include dynamic articulatory features
                          (bool, default True)
         sampling_rate  : sampling rate of the frames, in Hz (int, default 100)
+        n_jobs         : number of processes to use so as to load features
+                         (positive int, default 1) ; when an inverter is
+                         used, threads sharing it are used instead
         """
         # Arguments serve modularity; pylint: disable=too-many-arguments
         nonlocal abx_folder, get_utterances, _setup_features_loader
+        check_positive_int(n_jobs, 'n_jobs')
         # Build the abx folder, if necessary.
         if not os.path.isdir(abx_folder):
             os.makedirs(abx_folder)
@@ -134,18 +125,30 @@ def build_h5features_extractor(corpus):
             audio_features, ema_features, inverter, dynamic_ema, articulators
         )
         # Load the list of utterances and process them iteratively.
-        utterances = get_utterances()
-        with h5f.Writer(output_file) as writer:
-            for i in range(0, len(utterances), 100):
-                # Load or compute utterances list, features and time labels.
-                items = utterances[i:i + 100]
-                features = [load_features(item) for item in items]
-                labels = [
-                    np.arange(len(data)) / sampling_rate for data in features
-                ]
+        # note: an inverter cannot be sent to other processes, but its
+        #       session may be run by concurrent threads
+        batches = _load_features_batches(
+            load_features, get_utterances(), n_jobs,
+            use_threads=(inverter is not None)
+        )
+        # note: chunks of about 1 MB are used, rather than h5features'
+        #       default, to limit the amount of chunks written ; data
+        #       is lzf-compressed, which shrinks the file at low cost
+        with h5f.Writer(
+                output_file, chunk_size=1, compression='lzf'
+            ) as writer:
+            for i, (items, features) in enumerate(batches):
+                # Share a single time labels array across the batch's items.
+                times = (
+                    np.arange(max(len(data) for data in features))
+                    / sampling_rate
+                )
+                labels = [times[:len(data)] for data in features]
                 # Write the currently processed utterances' data to h5.
+                # note: data format is only checked on the first batch,
+                #       as all items are produced by the same loader
                 writer.write(
-                    h5f.Data(items, labels, features, check=True),
+                    h5f.Data(items, labels, features, check=(i == 0)),
                     groupname='features', append=True
                 )
 
@@ -154,6 +157,120 @@ def build_h5features_extractor(corpus):
     return extract_h5_features
 
 
+class FeaturesLoader:
+    """Picklable loader of the features associated with a corpus's utterances.
+
+    Loading functions are looked up by name in the corpus-specific
+    `load` submodule, so that instances may be sent to other processes.
+    They are looked up (and cached) once per process.
+    """
+    # More of a structure than a class; pylint: disable=too-few-public-methods
+
+    def __init__(
+            self, corpus, audio_features, ema_features,
+            dynamic_ema=True, articulators=None
+        ):
+        """Instantiate the features loader.
+
+        corpus         : name of the corpus whose utterances to load (str)
+        audio_features : optional name of audio features to use, including
+                         normalization indications
+        ema_features   : optional name of ema features' normalization to use
+                         (use '' for raw data and None for no EMA data)
+        dynamic_ema    : whether to include dynamic articulatory features
+                         (bool, default True)
+        articulators   : optional list of articulators to keep among EMA data
+        """
+        self.corpus = corpus
+        self.audio_features = audio_features
+        self.ema_features = ema_features
+        self.dynamic_ema = dynamic_ema
+        self.articulators = articulators
+
+    def __call__(self, utterance):
+        """Load the features associated with an utterance."""
+        load_acoustic, load_ema = _get_corpus_loaders(self.corpus)
+        acoustic = ema = None
+        if self.audio_features is not None:
+            acoustic = load_acoustic(
+                utterance, audio_type=self.audio_features, context_window=0
+            )
+        if self.ema_features is not None:
+            ema = load_ema(
+                utterance, norm_type=self.ema_features,
+                use_dynamic=self.dynamic_ema, articulators=self.articulators
+            )
+        if ema is None:
+            return acoustic
+        if acoustic is None:
+            return ema
+        # Fill a single pre-allocated array with both kinds of features.
+        n_audio = acoustic.shape[1]
+        features = np.empty(
+            (len(acoustic), n_audio + ema.shape[1]),
+            dtype=np.result_type(acoustic, ema)
+        )
+        features[:, :n_audio] = acoustic
+        features[:, n_audio:] = ema
+        return features
+
+
+@functools.lru_cache(maxsize=None)
+def _get_corpus_loaders(corpus):
+    """Return a corpus's (cached) acoustic and EMA data loading functions.
+
+    As instances of `FeaturesLoader` are pickled along with each task
+    sent to a worker process, caching is conducted at module level,
+    so that each process only looks up these functions once.
+    """
+    return import_from_string(
+        'ac2art.corpora.%s.load._load' % corpus, ['load_acoustic', 'load_ema']
+    )
+
+
+def _load_features_batches(
+        load_features, utterances, n_jobs, batch_size=100, use_threads=False
+    ):
+    """Yield batches of utterances' names and associated loaded features.
+
+    load_features : function loading the features of an utterance
+                    (which must be picklable if `n_jobs` is not 1,
+                    unless `use_threads` is True)
+    utterances    : list of names of the utterances to load
+    n_jobs        : number of processes (or threads) to use (positive int)
+    batch_size    : maximum number of utterances per batch (int, default 100)
+    use_threads   : whether to use threads rather than processes
+                    (bool, default False)
+
+    When using multiple workers, the loading of a batch's features
+    is submitted before yielding the previous one, so that the former
+    is computed while the latter is being handled by the caller.
+    """
+    batches = [
+        utterances[i:i + batch_size]
+        for i in range(0, len(utterances), batch_size)
+    ]
+    # Serially load the features, when required.
+    if n_jobs == 1:
+        for items in batches:
+            yield items, [load_features(item) for item in items]
+        return
+    # Otherwise, dispatch the features' loading across workers.
+    executor = (
+        concurrent.futures.ThreadPoolExecutor(n_jobs) if use_threads
+        else concurrent.futures.ProcessPoolExecutor(n_jobs)
+    )
+    with executor:
+        pending = None
+        for items in batches:
+            futures = [executor.submit(load_features, item) for item in items]
+            if pending is not None:
+                yield pending[0], [future.result() for future in pending[1]]
+            pending = (items, futures)
+        if pending is not None:
+            yield pending[0], [future.result() for future in pending[1]]
+
+
 def build_abxpy_callers(corpus):
     """Define and return corpus-specific functions to run ABXpy tasks.
 
@@ -175,29 +292,44 @@ def build_abxpy_callers(corpus):
     # Define the functions.
 
     def _phones_to_itemfile(utterance, symbols):
-        """Build a dict of item file rows for a given utterance."""
+        """Return an iterator over item file rows for a given utterance.
+
+        Rows are tuples whose elements match the columns of the
+        item files ('#file', 'onset', 'offset', '#phone', 'context'
+        and 'speaker').
+        """
         nonlocal load_phone_labels
-        phones = load_phone_labels(utterance)
-        times = [round(time - phones[0][0], 3) for time, _ in phones[:-1]]
-        phones = [symbols[phone] for _, phone in phones]
-        return {
-            '#file': [utterance] * (len(times) - 1),
-            'onset': times[:-1],
-            'offset': times[1:],
-            '#phone': phones[1:-1],
-            'context': [
-                phones[i - 1] + '_' + phones[i + 1]
-                for i in range(1, len(times))
-            ],
-            'speaker': utterance.split('_')[0]
-        }
-
-    def get_task_name(fileset, limit_phones):
-        """Return the base name of an ABX task file based on parameters."""
-        nonlocal corpus
-        fileset = '' if fileset is None else fileset + '_'
-        reduced = 'reduced_' * limit_phones
-        return corpus + '_' + fileset + reduced
+        # Yield no rows for utterances with less than two labels.
+        labels = load_phone_labels(utterance)
+        if len(labels) < 2:
+            return iter(())
+        # Unpack the labels' times and phones in a single pass.
+        times, phones = zip(*labels)
+        times = np.array(times[:-1], dtype=np.float64)
+        times = np.round(times - times[0], 3).tolist()
+        phones = list(map(symbols.__getitem__, phones))
+        contexts = map('_'.join, zip(phones, phones[2:]))
+        # note: file and speaker fields are repeated lazily, as zip
+        #       stops with the shortest (time-based) iterables
+        return zip(
+            itertools.repeat(utterance), times[:-1], times[1:], phones[1:-1],
+            contexts, itertools.repeat(utterance.split('_')[0])
+        )
+
+    def _get_abx_paths(fileset, byspeaker, limit_phones):
+        """Return the paths to an ABX task's files, based on parameters.
+
+        Return the path to the item file, that to the task file,
+        and the task's name (without the corpus prefix), which is
+        used to name the ABX scores files.
+        """
+        nonlocal abx_folder, corpus
+        task_name = '' if fileset is None else fileset + '_'
+        task_name += 'reduced_' * limit_phones
+        prefix = os.path.join(abx_folder, corpus + '_' + task_name)
+        task_name += 'byspk_' * byspeaker
+        task_file = os.path.join(abx_folder, corpus + '_' + task_name)
+        return prefix + 'phones.item', task_file + 'task.abx', task_name
 
     def make_itemfile(fileset=None, limit_phones=False):
         """Build a .item file for ABXpy recording {0} phone labels.
@@ -207,28 +339,25 @@ def build_abxpy_callers(corpus):
                        the 'common_reduced' column of the symbols
                        file as mapping (bool, default False)
         """
-        nonlocal abx_folder, corpus, get_utterances, _phones_to_itemfile
+        nonlocal corpus, get_utterances, _get_abx_paths, _phones_to_itemfile
         print('Creating item file...')
         # Establish the item file's location.
-        output_file = get_task_name(fileset, limit_phones) + 'phones.item'
-        output_file = os.path.join(abx_folder, output_file)
-        # Write the item file's header.
-        columns = ['#file', 'onset', 'offset', '#phone', 'context', 'speaker']
-        with open(output_file, mode='w') as itemfile:
-            itemfile.write(' '.join(columns) + '\n')
+        output_file = _get_abx_paths(fileset, False, limit_phones)[0]
         # Load the corpus-specific to cross-corpus phone symbols mapping dict.
         # note: non-ipa cross-corpus symbols are used because ABXpy
         #       (python 2) does not support non-ascii characters
-        symbols = pd.read_csv(
-            CONSTANTS['symbols_file'], index_col=corpus
-        )['common' + '_reduced' * limit_phones].to_dict()
-        # Iteratively add utterances phone labels to the item file.
-        for utterance in get_utterances(fileset):
-            items = pd.DataFrame(_phones_to_itemfile(utterance, symbols))
-            items[columns].to_csv(
-                output_file, index=False, header=False,
-                sep=' ', mode='a', encoding='utf-8'
-            )
+        symbols = load_symbols_mapping(
+            CONSTANTS['symbols_file'], corpus,
+            'common' + '_reduced' * limit_phones
+        )
+        # Write the item file's header, then iteratively add
+        # utterances phone labels to it, through a single handle.
+        columns = ['#file', 'onset', 'offset', '#phone', 'context', 'speaker']
+        with open(output_file, mode='w', encoding='utf-8') as itemfile:
+            writer = csv.writer(itemfile, delimiter=' ', lineterminator='\n')
+            writer.writerow(columns)
+            for utterance in get_utterances(fileset):
+                writer.writerows(_phones_to_itemfile(utterance, symbols))
         print('Done creating %s file.' % output_file)
 
     def make_abx_task(fileset=None, byspeaker=True, limit_phones=False):
@@ -241,19 +370,18 @@ def build_abxpy_callers(corpus):
                        the 'common_reduced' column of the symbols
                        file as mapping (bool, default False)
         """
-        nonlocal abx_folder, corpus, make_itemfile
+        nonlocal _get_abx_paths, make_itemfile
         print('Creating task file...')
+        # Establish the item and task files' paths.
+        item_file, output_file, _ = (
+            _get_abx_paths(fileset, byspeaker, limit_phones)
+        )
         # Build the item file if necessary.
-        task_name = get_task_name(fileset, limit_phones)
-        item_file = os.path.join(abx_folder, task_name + 'phones.item')
         if not os.path.isfile(item_file):
             make_itemfile(fileset, limit_phones)
         else:
             print('Using found %s file.' % item_file)
-        # Establish the task file's path and the ABXpy task's 'on' argument.
-        output_file = os.path.join(
-            abx_folder, task_name + ('byspk_' * byspeaker) + 'task.abx'
-        )
+        # Establish the ABXpy task's 'on' argument.
         within = 'context speaker' if byspeaker else 'context'
         # Run the ABXpy task module.
         abxpy_task(item_file, output_file, on='phone', by=within)
@@ -276,18 +404,19 @@ def build_abxpy_callers(corpus):
                        file as mapping (bool, default False)
         n_jobs       : number of CPU cores to use (positive int, default 1)
         """
-        nonlocal abx_folder, corpus, make_abx_task
+        nonlocal abx_folder, _get_abx_paths, make_abx_task
         check_type_validity(features, str, 'features')
         check_type_validity(fileset, (str, type(None)), 'fileset')
         check_positive_int(n_jobs, 'n_jobs')
         # Declare the path to the task file.
-        task_name = get_task_name(fileset, limit_phones)
-        task_name += 'byspk_' * byspeaker
-        task_file = os.path.join(abx_folder, task_name + 'task.abx')
+        _, task_file, task_name = (
+            _get_abx_paths(fileset, byspeaker, limit_phones)
+        )
         # Declare paths to the input features and output scores files.
         features_file = os.path.join(abx_folder, features + '.features')
-        scores_file = features + '_' + task_name.split('_', 1)[1] + 'abx.csv'
-        scores_file = os.path.join(abx_folder, scores_file)
+        scores_file = os.path.join(
+            abx_folder, features + '_' + task_name + 'abx.csv'
+        )
         # Check that the features file exists.
         if not os.path.exists(features_file):
             raise FileNotFoundError("No such file: '%s'." % features_file)
@@ -310,12 +439,16 @@ def build_abxpy_callers(corpus):
         data = pd.read_csv(path)
         # Collapse the scores (i.e. forget about contexts and speakers).
         data['score'] *= data['n']
-        data['phones'] = data.apply(
-            lambda row: '_'.join(sorted([row['phone_1'], row['phone_2']])),
-            axis=1
-        )
-        scores = data.groupby('phones')[['score', 'n']].sum()
+        is_sorted = data['phone_1'] <= data['phone_2']
+        first = data['phone_1'].where(is_sorted, data['phone_2'])
+        second = data['phone_2'].where(is_sorted, data['phone_1'])
+        scores = data.groupby([first, second])[['score', 'n']].sum()
         scores['score'] /= scores['n']
+        # Name the phone pairs after grouping, i.e. once per unique pair.
+        scores.index = pd.Index(
+            [phone_1 + '_' + phone_2 for phone_1, phone_2 in scores.index],
+            name='phones'
+        )
         # Return the properly-formatted scores.
         return scores
 
@@ -332,9 +465,22 @@ def add_ipa_symbols(scores_file):
     """Replace phone symbols in an ABXpy scores file with IPA ones."""
     print('Replacing phoneme symbols with IPA ones...')
     scores = pd.read_csv(scores_file, sep='\t')
-    symbols = pd.read_csv(CONSTANTS['symbols_file'], index_col='common')
-    symbols = symbols['ipa'].to_dict()
+    symbols = load_symbols_mapping(CONSTANTS['symbols_file'], 'common', 'ipa')
     for col in ('phone_1', 'phone_2'):
-        scores[col] = scores[col].apply(symbols.get)
+        scores[col] = scores[col].map(symbols)
     scores.to_csv(scores_file, sep=',', index=False)
     print('Done updating scores file.')
+
+
+@functools.lru_cache(maxsize=None)
+def load_symbols_mapping(path, index_col, column):
+    """Return a dict mapping phone symbols from a symbols file's columns.
+
+    path      : path to the csv file of phone symbols
+    index_col : name of the column whose symbols to use as keys
+    column    : name of the column whose symbols to use as values
+
+    The loaded mappings are cached, hence the returned dict
+    should not be modified.
+    """
+    return pd.read_csv(path, index_col=index_col)[column].to_dict()
@@ -189,7 +189,13 @@ def build_file_loaders(corpus):
         """
         nonlocal data_folder
         path = _get_normfile_path(data_folder, file_type, speaker)
-        return np.load(path).tolist()
+        # Support moments stored as a pickled dict by former versions.
+        if not os.path.isfile(path):
+            legacy_path = os.path.splitext(path)[0] + '.npy'
+            if os.path.isfile(legacy_path):
+                return np.load(legacy_path, allow_pickle=True).item()
+        with np.load(path) as moments:
+            return dict(moments)
 
     def get_utterances(set_name=None):
         """Get the list of utterances from a given set.
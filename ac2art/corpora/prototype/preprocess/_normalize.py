@@ -20,12 +20,14 @@
 """Wrapper to build corpus-specific data normalization functions."""
 
 import os
+import concurrent.futures
+import functools
 import shutil
 
 import numpy as np
 
 from ac2art.corpora.prototype.utils import _get_normfile_path
-from ac2art.utils import import_from_string, CONSTANTS
+from ac2art.utils import check_positive_int, import_from_string, CONSTANTS
 
 
 def build_normalization_functions(corpus):
@@ -37,11 +39,18 @@ def build_normalization_functions(corpus):
     """
     # Gather dataset-specific dependencies.
     main_folder = CONSTANTS['%s_processed_folder' % corpus]
-    get_utterances_list, speakers = import_from_string(
+    list_utterances, speakers = import_from_string(
         'ac2art.corpora.%s.raw._loaders' % corpus,
         ['get_utterances_list', 'SPEAKERS']
     )
 
+    # Cache the lists of utterances, which are repeatedly looked up for.
+    @functools.lru_cache(maxsize=None)
+    def get_utterances_list(speaker=None):
+        """Return the (cached) tuple of names of a speaker's utterances."""
+        nonlocal list_utterances
+        return tuple(list_utterances(speaker))
+
     # Wrap the normalization parameters computing function.
     def compute_moments(file_type, by_speaker=False, store=True):
         """Compute files moments."""
@@ -60,7 +69,7 @@ def build_normalization_functions(corpus):
         )
 
     # Wrap the files normalization functon.
-    def normalize_files(file_type, norm_type, scope='corpus'):
+    def normalize_files(file_type, norm_type, scope='corpus', n_jobs=1):
         """Normalize pre-extracted {0} data of a given type.
 
         Normalization includes de-meaning and division by either
@@ -73,25 +82,34 @@ def build_normalization_functions(corpus):
         scope      : scope of the normalization parameters to use
                      ('corpus' for corpus-wide (default), 'speaker'
                      for speaker-wise and 'file' for file-wise)
+        n_jobs     : number of processes to use so as to normalize
+                     the files (positive int, default 1)
 
         Normalized utterances are stored as .npy files in a
         properly-named folder.
+
+        Corpus-wide and speaker-wise normalization rely on moments
+        stored by `compute_moments`, which is only called (once per
+        scope) when they are missing. File-wise normalization computes
+        each file's moments when normalizing it, and never loads nor
+        computes stored moments, hence reads each file only once.
         """
         nonlocal compute_moments, get_utterances_list, main_folder, speakers
+        check_positive_int(n_jobs, 'n_jobs')
         if scope == 'corpus':
             _corpus_wide_normalize(
                 file_type, norm_type, None, main_folder,
-                get_utterances_list, compute_moments
+                get_utterances_list, compute_moments, n_jobs
             )
         elif scope == 'speaker':
             for speaker in speakers:
                 _corpus_wide_normalize(
                     file_type, norm_type, speaker, main_folder,
-                    get_utterances_list, compute_moments
+                    get_utterances_list, compute_moments, n_jobs
                 )
         elif scope == 'file':
             _file_wise_normalize(
-                file_type, norm_type, main_folder, get_utterances_list
+                file_type, norm_type, main_folder, get_utterances_list, n_jobs
             )
         else:
             raise ValueError(
@@ -118,44 +136,64 @@ def _compute_moments(
     store      : whether to store the computed values (bool, default True)
 
     Return a dict containing the computed values.
-    Optionally write it to a dedicated .npy file.
+    Optionally write them to a dedicated .npz file.
     """
     folder = os.path.join(main_folder, file_type)
-    # Compute file-wise means and standard deviations.
-    dataset = np.array([
-        np.load(os.path.join(folder, name + '_%s.npy' % file_type))
-        for name in get_utterances_list(speaker)
-    ])
+    # Compute file-wise moments, loading a single file at a time.
+    file_means, file_stds, file_sizes = [], [], []
+    file_min, file_max = [], []
+    for name in get_utterances_list(speaker):
+        path = os.path.join(folder, name + '_%s.npy' % file_type)
+        data = np.load(path, mmap_mode='r')
+        file_means.append(data.mean(axis=0))
+        file_stds.append(data.std(axis=0))
+        file_sizes.append(len(data))
+        file_min.append(data.min(axis=0))
+        file_max.append(data.max(axis=0))
+    file_means = np.array(file_means)
+    file_stds = np.array(file_stds)
+    file_min = np.array(file_min)
+    file_max = np.array(file_max)
+    # Derive corpus-wide means, standard deviations and spread from
+    # the file-wise ones (pooling files' within and between variance).
+    weights = np.array(file_sizes, dtype=np.float64) / sum(file_sizes)
+    weights = np.expand_dims(weights, 1)
+    global_means = np.sum(weights * file_means, axis=0)
+    global_variance = np.sum(
+        weights * (
+            np.square(file_stds) + np.square(file_means - global_means)
+        ), axis=0
+    )
     moments = {
-        'file_means': np.array([data.mean(axis=0) for data in dataset]),
-        'file_stds': np.array([data.std(axis=0) for data in dataset]),
-        'file_spread': np.array([
-            data.max(axis=0) - data.min(axis=0) for data in dataset
-        ])
+        'file_means': file_means,
+        'file_stds': file_stds,
+        'file_spread': file_max - file_min,
+        'global_means': global_means,
+        'global_stds': np.sqrt(global_variance),
+        'global_spread': file_max.max(axis=0) - file_min.min(axis=0)
     }
-    # Compute corpus-wide means, standard deviations and spread.
-    dataset = np.concatenate(dataset)
-    moments.update({
-        'global_means': dataset.mean(axis=0),
-        'global_stds': dataset.std(axis=0),
-        'global_spread': dataset.max(axis=0) - dataset.min(axis=0)
-    })
     # Optionally store the computed values to disk.
     if store:
         path = _get_normfile_path(main_folder, file_type, speaker)
         folder = os.path.dirname(path)
         if not os.path.isdir(folder):
             os.makedirs(folder)
-        np.save(path, moments)
+        np.savez(path, **moments)
     # Return the dict of computed values.
     return moments
 
 
 def _conduct_normalization(
         file_type, norm_name, normalize, speaker,
-        main_folder, get_utterances_list
+        main_folder, get_utterances_list, n_jobs=1
     ):
-    """Conduct normalization of utterances using a pre-built function."""
+    """Conduct normalization of utterances using a pre-built function.
+
+    If `n_jobs` is not 1, files are normalized in parallel, hence
+    `normalize` must be picklable (e.g. a `functools.partial` of
+    a module-level function).
+    """
+    # Arguments serve modularity; pylint: disable=too-many-arguments
     # Establish output folder to use. Build it if needed.
     output_folder = os.path.join(main_folder, file_type + '_norm_' + norm_name)
     if not os.path.isdir(output_folder):
@@ -165,11 +203,18 @@ def _conduct_normalization(
     files = [
         name + '_%s.npy' % file_type for name in get_utterances_list(speaker)
     ]
-    # Iteratively normalize the files.
-    for filename in files:
-        data = np.load(os.path.join(input_folder, filename))
-        data = normalize(data)
-        np.save(os.path.join(output_folder, filename), data)
+    normalize_file = functools.partial(
+        _normalize_file, input_folder=input_folder,
+        output_folder=output_folder, normalize=normalize
+    )
+    # Normalize the files, either iteratively or in parallel.
+    if n_jobs == 1:
+        for filename in files:
+            normalize_file(filename)
+    else:
+        with concurrent.futures.ProcessPoolExecutor(n_jobs) as executor:
+            # Consume the results so as to propagate any exception.
+            list(executor.map(normalize_file, files, chunksize=8))
     # When normalizing articulatory features, copy articulators list.
     if file_type == 'ema':
         shutil.copyfile(
@@ -178,44 +223,94 @@ def _conduct_normalization(
         )
 
 
+def _normalize_file(filename, input_folder, output_folder, normalize):
+    """Normalize the data of a given file and save it to a given folder.
+
+    The input file is memory-mapped, as `normalize` is expected
+    to return a newly-allocated array rather than alter its input.
+
+    Normalized data is stored with float32 precision, which is
+    ample for features that are eventually fed to tensorflow
+    models as such.
+    """
+    data = np.load(os.path.join(input_folder, filename), mmap_mode='r')
+    data = normalize(data).astype(np.float32, copy=False)
+    np.save(os.path.join(output_folder, filename), data, allow_pickle=False)
+
+
 def _corpus_wide_normalize(
         file_type, norm_type, speaker, main_folder,
-        get_utterances_list, compute_moments
+        get_utterances_list, compute_moments, n_jobs=1
     ):
     """Normalize a corpus using corpus-wide or speaker-wise parameters."""
+    # Arguments serve modularity; pylint: disable=too-many-arguments
     # Gather files' moments. Compute them if needed.
+    # Only the two required arrays are read from stored moments.
     path = _get_normfile_path(main_folder, file_type, speaker)
     if os.path.isfile(path):
-        moments = np.load(path).tolist()
-    elif speaker is None:
-        moments = compute_moments(file_type, by_speaker=False)
+        with np.load(path) as moments:
+            means = moments['global_means']
+            norm = moments['global_%s' % norm_type]
     else:
-        moments = compute_moments(file_type, by_speaker=True)[speaker]
-    means = moments['global_means']
-    norm = moments['global_%s' % norm_type]
+        if speaker is None:
+            moments = compute_moments(file_type, by_speaker=False)
+        else:
+            moments = compute_moments(file_type, by_speaker=True)[speaker]
+        means = moments['global_means']
+        norm = moments['global_%s' % norm_type]
     # Iteratively normalize the utterances.
-    normalize = lambda utterance: (utterance - means) / norm
+    normalize = functools.partial(
+        _normalize_with_moments, means=means, inv_norm=np.reciprocal(norm)
+    )
     norm_name = norm_type + ('' if speaker is None else '_byspeaker')
     _conduct_normalization(
         file_type, norm_name, normalize, speaker,
-        main_folder, get_utterances_list
+        main_folder, get_utterances_list, n_jobs
     )
 
 
+def _normalize_with_moments(utterance, means, inv_norm):
+    """Normalize an utterance's data using pre-computed moments.
+
+    utterance : 2-D numpy.ndarray of data to normalize
+    means     : 1-D numpy.ndarray of means to substract
+    inv_norm  : 1-D numpy.ndarray of inverted normalization divisors
+    """
+    # Scale in place so as to avoid allocating a second array.
+    normalized = np.subtract(utterance, means)
+    normalized *= inv_norm
+    return normalized
+
+
 def _file_wise_normalize(
-        file_type, norm_type, main_folder, get_utterances_list
+        file_type, norm_type, main_folder, get_utterances_list, n_jobs=1
     ):
     """Normalize a corpus using file-specific parameters."""
-    # Define a file-wise normalization function.
-    if norm_type == 'stds':
-        get_norm = lambda utt: utt.std(axis=0)
-    elif norm_type == 'spread':
-        get_norm = lambda utt: (utt.max(axis=0) - utt.min(axis=0))
-    else:
+    # Check the normalization divisor's validity.
+    if norm_type not in ('stds', 'spread'):
         raise KeyError("'norm_type' should be one of {'stds', 'spread'}.")
-    normalize = lambda utt: (utt - utt.mean(axis=0)) / get_norm(utt)
-    # Conduct normalization using the previously defined function.
+    # Conduct normalization using a file-wise normalization function.
+    normalize = functools.partial(_normalize_by_file, norm_type=norm_type)
     norm_name = norm_type + '_byfile'
     _conduct_normalization(
-        file_type, norm_name, normalize, None, main_folder, get_utterances_list
+        file_type, norm_name, normalize, None,
+        main_folder, get_utterances_list, n_jobs
     )
+
+
+def _normalize_by_file(utterance, norm_type):
+    """Normalize an utterance's data using its own moments."""
+    normalized = np.subtract(utterance, utterance.mean(axis=0))
+    # Derive standard deviations from the de-meaned data, summing
+    # squares without allocating an intermediate array.
+    # note: squares are accumulated with float64 precision
+    if norm_type == 'stds':
+        squares = np.einsum(
+            'ij,ij->j', normalized, normalized, dtype=np.float64
+        )
+        norm = np.sqrt(squares / len(normalized))
+    else:
+        norm = utterance.max(axis=0) - utterance.min(axis=0)
+    # Scale in place so as to avoid allocating a second array.
+    normalized *= np.reciprocal(norm)
+    return normalized
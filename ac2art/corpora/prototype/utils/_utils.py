@@ -20,6 +20,7 @@
 """Set of utility functions used internally in the prototype submodule."""
 
 import os
+import functools
 
 
 from ac2art.utils import CONSTANTS
@@ -28,16 +29,25 @@ from ac2art.utils import CONSTANTS
 def _get_normfile_path(main_folder, file_type, speaker):
     """Get the path to a norm parameters file."""
     name = file_type if speaker is None else '%s_%s' % (file_type, speaker)
-    return os.path.join(main_folder, 'norm_params', 'norm_%s.npy' % name)
+    return os.path.join(main_folder, 'norm_params', 'norm_%s.npz' % name)
 
 
 def load_articulators_list(corpus, norm_type=None):
     """Load the list of articulators contained in a corpus's data."""
     folder = 'ema_norm_%s' % norm_type if norm_type else 'ema'
     folder = os.path.join(CONSTANTS['%s_processed_folder' % corpus], folder)
-    with open(os.path.join(folder, 'articulators'), encoding='utf-8') as file:
-        articulators = [row.strip('\n') for row in file]
-    return articulators
+    return list(_read_articulators_file(os.path.join(folder, 'articulators')))
+
+
+@functools.lru_cache(maxsize=None)
+def _read_articulators_file(path):
+    """Read and return the (cached) tuple of articulators in a given file.
+
+    Caching spares reading the same file again each time
+    an utterance's articulatory data is loaded.
+    """
+    with open(path, encoding='utf-8') as file:
+        return tuple(row.strip('\n') for row in file)
 
 
 def read_transcript(path, phonetic=False, silences=None, fields=3):
@@ -44,10 +44,19 @@ def get_delta_features(array, window=5):
     array  : 2-D numpy.ndarray of values whose delta to compute
     window : half-size of the time window used (int, default 5)
     """
-    norm = 2 * np.sum(i ** 2 for i in range(1, window + 1))
-    return np.sum(
-        get_simple_difference(array, lag) * lag for lag in range(1, window + 1)
-    ) / norm
+    # note: this is the closed form of 2 * sum(i ** 2) for i in [1, window]
+    norm = window * (window + 1) * (2 * window + 1) / 3
+    # Pad the series once with copies of its first and last values,
+    # then accumulate lag-weighted differences of its shifted views.
+    padded = np.pad(array, ((window, window), (0, 0)), mode='edge')
+    length = len(array)
+    delta = np.zeros(array.shape)
+    for lag in range(1, window + 1):
+        future = padded[window + lag:window + lag + length]
+        past = padded[window - lag:window - lag + length]
+        delta += lag * (future - past)
+    delta /= norm
+    return delta
 
 
 def get_simple_difference(array, lag):
@@ -134,17 +143,17 @@ def interpolate_missing_values(array):
         raise TypeError("'array' must be one-dimensional.")
     # Identify NaN values. If there aren't any, simply return the array.
     is_nan = np.isnan(array)
-    if is_nan.sum() == 0:
+    if not is_nan.any():
         return array
     array = array.copy()
     not_nan = ~ is_nan
     # Build a cubic spline out of non-NaN values.
     spline = scipy.interpolate.splrep(
-        np.argwhere(not_nan).ravel(), array[not_nan], k=3
+        np.flatnonzero(not_nan), array[not_nan], k=3
     )
-    # Interpolate missing values and replace them.
-    for i in np.argwhere(is_nan).ravel():
-        array[i] = scipy.interpolate.splev(i, spline)
+    # Interpolate all missing values at once and replace them.
+    nan_index = np.flatnonzero(is_nan)
+    array[nan_index] = scipy.interpolate.splev(nan_index, spline)
     return array
 
 
@@ -173,13 +182,14 @@ def lowpass_filter(signal, cutoff, sample_rate, order=5):
     ], axis=1)
 
 
-def sequences_to_batch(sequences, length=None):
+def sequences_to_batch(sequences, length=None, dtype=np.float64):
     """Batch a set of data sequences into a three-dimensional array.
 
     sequences : list of array of two-dimensional numpy arrays sharing
                 the same shape on their last dimension
     length    : optional size of the batched array's second dimension
                 (otherwise, maximum sample length is used)
+    dtype     : data type of the returned array (default numpy.float64)
 
     Return a numpy.array of shape [n_sequences, length, sequences_width].
     """
@@ -211,13 +221,10 @@ def sequences_to_batch(sequences, length=None):
         batch_sizes = np.array([
             min(len(sequence), length) for sequence in sequences
         ])
-    # Zero-pad the sequences and concatenate them.
-    batched = np.array([
-        np.concatenate([
-            seq[:length], np.zeros((length - seq_length, seq.shape[1]))
-        ])
-        for seq, seq_length in zip(sequences, batch_sizes)
-    ])
+    # Fill the sequences into a zero-initialized array.
+    batched = np.zeros((len(sequences), length, width), dtype=dtype)
+    for i, sequence in enumerate(sequences):
+        batched[i, :batch_sizes[i]] = sequence[:length]
     # Return the batched sequences and the true sequence lengths.
     return batched, batch_sizes
 
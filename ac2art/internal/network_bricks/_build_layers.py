@@ -20,7 +20,7 @@
 """Set of functions to build neural networks' layers stacks."""
 
 import time
-from collections import OrderedDict
+from collections import Counter, OrderedDict
 
 
 from ac2art.internal.neural_layers import (
@@ -57,21 +57,21 @@ def build_layers_stack(
     # Optionally check the layers_config argument's validity.
     if check_config:
         check_type_validity(layers_config, list, 'layers_config')
-        for i, config in enumerate(layers_config):
-            layers_config[i] = validate_layer_config(config)
+        layers_config = [
+            validate_layer_config(config) for config in layers_config
+        ]
     # Build the layers' stack container and a type-wise layers counter.
     layers_stack = OrderedDict([])
-    layers_counter = {}
+    layers_counter = Counter()
     # Iteratively build the layers.
     for name, n_units, kwargs in layers_config:
         # Get the layer's class and give the layer a name.
         layer_class = get_layer_class(name)
-        layer_name = kwargs.pop(
-            'name', name + '_%s' % layers_counter.setdefault(name, 0)
-        )
+        # note: kwargs are copied, so as not to alter the configuration
+        kwargs = kwargs.copy()
+        layer_name = kwargs.pop('name', name + '_%s' % layers_counter[name])
         # Handle dropout and naming, if relevant.
         if issubclass(layer_class, (DenseLayer, AbstractRNN)):
-            kwargs = kwargs.copy()
             kwargs.setdefault('keep_prob', keep_prob)
             kwargs['name'] = layer_name
             # Avoid RNN scope issues. Feed batch sizes, if any.
@@ -95,6 +95,9 @@ def get_layer_class(layer_class):
                   SignalFilter, or the (short) name of one such class
     """
     if isinstance(layer_class, str):
+        # Look up short names directly, sparing get_object's checks.
+        if layer_class in LAYER_CLASSES:
+            return LAYER_CLASSES[layer_class]
         return get_object(layer_class, LAYER_CLASSES, 'layer class')
     if issubclass(layer_class, (AbstractRNN, DenseLayer, SignalFilter)):
         return layer_class
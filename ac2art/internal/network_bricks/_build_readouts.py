@@ -96,7 +96,7 @@ def refine_signal(
     tf.assert_rank_in(signal, (2, 3))
     # Optionally de-normalize the initial signal.
     if norm_params is not None:
-        signal *= norm_params
+        signal *= norm_params.astype(signal.dtype.as_numpy_dtype)
     # Optionally filter the signal.
     if filter_config is None:
         top_filter = None
@@ -118,6 +118,10 @@ class DenseLayer:
             session.run(self.bias.initializer)
         session.run(self.weights.initializer)
 
+    def trainable_tensors(self):
+        """Return a list containing the layer's weight tensor."""
+        return [self.weights]
+
     def get_values(self, session):
         """Return the layer's weight and bias current values.
 
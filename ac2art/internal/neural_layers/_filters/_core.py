@@ -142,6 +142,14 @@ class SignalFilter(metaclass=ABCMeta):
         """Docstring."""
         raise NotImplementedError("No '_build_filter' method defined.")
 
+    def trainable_tensors(self):  # pylint: disable=no-self-use
+        """Return an empty list, as filters are not trained as neural layers.
+
+        Learnable cutoffs are trained apart, see the
+        `get_cutoff_training_function` method.
+        """
+        return []
+
     def get_values(self, session):
         """Return the current cutoff value.
 
@@ -108,6 +108,11 @@ class AbstractRNN(metaclass=ABCMeta):
             'dropout': self.keep_prob is not None
         }
 
+    @abstractmethod
+    def trainable_tensors(self):
+        """Return a flat list of the network's cells' weights tensors."""
+        raise NotImplementedError("No 'trainable_tensors' method defined.")
+
     @abstractmethod
     def get_values(self, session):
         """Return the network's cells' weights' current values."""
@@ -216,6 +221,10 @@ class RecurrentNeuralNetwork(AbstractRNN):
             (weights[i], weights[i + 1]) for i in range(0, len(weights), 2)
         ]
 
+    def trainable_tensors(self):
+        """Return a flat list of the network's cells' weights tensors."""
+        return [tensor for weights in self.weights for tensor in weights]
+
     def get_values(self, session):
         """Return the network's cells' kernel and bias weights' current values.
 
@@ -323,6 +332,13 @@ class BidirectionalRNN(AbstractRNN):
         configuration.update({'aggregate': self.aggregate})
         return configuration
 
+    def trainable_tensors(self):
+        """Return a flat list of the network's cells' weights tensors."""
+        return [
+            tensor for cells_weights in self.weights
+            for weights in cells_weights for tensor in weights
+        ]
+
     def get_values(self, session):
         """Return the network's cells' kernel and bias weights' current values.
 
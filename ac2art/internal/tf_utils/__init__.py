@@ -28,6 +28,7 @@ from ._tf_utils import (
     get_delta_features,
     get_simple_difference,
     get_rnn_cell_type_name,
+    get_session_config,
     index_tensor,
     log_base,
     minimize_safely,
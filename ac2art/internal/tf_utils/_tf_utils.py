@@ -20,6 +20,7 @@
 """Set of tensorflow-related utility functions."""
 
 import inspect
+import os
 
 import tensorflow as tf
 import numpy as np
@@ -38,7 +39,7 @@ def add_dynamic_features(tensor, window=5, axis=1):
     """
     tf.assert_rank(tensor, 2)
     delta = get_delta_features(tensor, window)
-    deltadelta = get_delta_features(tensor, window)
+    deltadelta = get_delta_features(delta, window)
     return tf.concat([tensor, delta, deltadelta], axis=axis)
 
 
@@ -57,7 +58,11 @@ def batch_tensor_mean(tensor, batch_sizes):
     maxlen = tensor.shape[1].value
     mask = tf.sequence_mask(batch_sizes, maxlen=maxlen, dtype=tf.float32)
     mask = tf.expand_dims(mask, 2)
-    return tf.reduce_sum(tensor * mask, axis=-2) / tf.reduce_sum(mask, axis=1)
+    # Divide by the sequences' lengths, rather than by the mask's sum.
+    # Empty sequences are assigned a zero mean instead of a NaN one.
+    lengths = tf.expand_dims(tf.maximum(batch_sizes, 1), 1)
+    lengths = tf.cast(lengths, tf.float32)
+    return tf.reduce_sum(tensor * mask, axis=-2) / lengths
 
 
 def binary_step(tensor):
@@ -90,14 +95,29 @@ def get_activation_function_name(function):
 def get_delta_features(tensor, window=5):
     """Compute and return delta features, using a given time window.
 
-    static_features : 2-D tensor of values whose delta to compute
-    window          : half-size of the time window used (int, default 5)
+    tensor : 2-D tensor of values whose delta to compute
+    window : half-size of the time window used (int, default 5)
+
+    Delta features are computed through a single convolution of
+    the edge-padded features with an antisymmetric kernel, which
+    is equivalent to weighting and summing the simple differences
+    of the series for lags ranging from 1 to `window`.
     """
-    norm = 2 * sum(i ** 2 for i in range(1, window + 1))
-    delta = tf.add_n([
-        get_simple_difference(tensor, lag=i) * i for i in range(1, window + 1)
-    ])
-    return delta / norm
+    tf.assert_rank(tensor, 2)
+    # Pad the series with copies of its first and last values.
+    padded = tf.concat([
+        tf.tile(tensor[:1], [window, 1]), tensor,
+        tf.tile(tensor[-1:], [window, 1])
+    ], axis=0)
+    # Set up the kernel, whose i-th value is (i - window) / norm.
+    # note: this is the closed form of 2 * sum(i ** 2) for i in [1, window]
+    norm = window * (window + 1) * (2 * window + 1) / 3
+    kernel = np.arange(-window, window + 1).reshape((-1, 1, 1)) / norm
+    kernel = tf.constant(kernel, dtype=tensor.dtype)
+    # Convolve each feature's series, treated as a batched 1-D signal.
+    signal = tf.expand_dims(tf.transpose(padded), 2)
+    delta = tf.nn.conv1d(signal, kernel, 1, 'VALID')
+    return tf.transpose(tf.squeeze(delta, axis=2))
 
 
 def get_rnn_cell_type_name(cell_type):
@@ -105,6 +125,22 @@ def get_rnn_cell_type_name(cell_type):
     return get_object_name(cell_type, RNN_CELL_TYPES)
 
 
+def get_session_config():
+    """Return a tensorflow session configuration for ac2art models.
+
+    XLA JIT auto-clustering of the graphs' operations may be enabled
+    by setting the 'AC2ART_XLA' environment variable to '1'. It is
+    off by default, as it requires an XLA-enabled tensorflow build,
+    and some ops (e.g. of cuDNN-based RNN cells) cannot be clustered.
+    """
+    config = tf.ConfigProto()
+    if os.environ.get('AC2ART_XLA', '0') == '1':
+        config.graph_options.optimizer_options.global_jit_level = (
+            tf.OptimizerOptions.ON_1
+        )
+    return config
+
+
 def get_simple_difference(tensor, lag):
     """Compute and return the simple difference of a series for a given lag.
 
@@ -113,10 +149,11 @@ def get_simple_difference(tensor, lag):
              between values at times t + lag and t - lag
     """
     tf.assert_rank(tensor, 2)
-    padding = tf.ones((lag, tensor.shape[1].value))
-    past = tf.concat([padding * tensor[0], tensor[:-lag]], axis=0)
-    future = tf.concat([tensor[lag:], padding * tensor[-1]], axis=0)
-    return future - past
+    # Pad the series once with copies of its first and last values.
+    padded = tf.concat([
+        tf.tile(tensor[:1], [lag, 1]), tensor, tf.tile(tensor[-1:], [lag, 1])
+    ], axis=0)
+    return padded[2 * lag:] - padded[:-2 * lag]
 
 
 def index_tensor(tensor, start=0):
@@ -136,12 +173,13 @@ def index_tensor(tensor, start=0):
 
 def log_base(tensor, base):
     """Compute the logarithm of a given tensorflow Tensor in a given base."""
-    if isinstance(base, tf.Tensor) and base.dtype in [tf.int32, tf.int64]:
-        base = tf.cast(base, tf.float32)
-    elif isinstance(base, int):
-        base = float(base)
     if tensor.dtype in [tf.int32, tf.int64]:
         tensor = tf.cast(tensor, tf.float32)
+    # When the base is a constant, scale by its pre-computed inverse log.
+    if isinstance(base, (int, float)):
+        return tf.log(tensor) * float(1 / np.log(base))
+    if base.dtype in [tf.int32, tf.int64]:
+        base = tf.cast(base, tf.float32)
     return tf.log(tensor) / tf.log(base)
 
 
@@ -161,15 +199,17 @@ def minimize_safely(optimizer, loss, var_list=None, reduce_fn=None):
     # Set up a NaN values replacing function.
     def clean(gradient):
         """Replace all NaN values in a given gradient Tensor."""
-        default = tf.cond(
-            tf.reduce_sum(tf.cast(tf.is_finite(gradient), tf.float32)) > 0,
-            lambda: (
-                tf.zeros_like(gradient) if reduce_fn is None
-                else tf.ones_like(gradient) * reduce_fn(gradient)
-            ),
-            lambda: tf.zeros_like(gradient),
-        )
-        return tf.where(tf.is_finite(gradient), gradient, default)
+        is_finite = tf.is_finite(gradient)
+        # Select the default value without branching the graph.
+        if reduce_fn is None:
+            default = tf.zeros_like(gradient)
+        else:
+            default = tf.where(
+                tf.reduce_any(is_finite),
+                tf.ones_like(gradient) * reduce_fn(gradient),
+                tf.zeros_like(gradient)
+            )
+        return tf.where(is_finite, gradient, default)
 
     # Replace all NaN values and apply the gradients.
     gradients = [
@@ -187,34 +227,31 @@ def reduce_finite_mean(tensor, axis=None):
     # Check argument's type validity.
     check_type_validity(tensor, tf.Tensor, 'tensor')
     check_type_validity(axis, (int, type(None)), 'axis')
-    # Compute the number of non-Nan elements across the reduction axis.
+    # Replace non-finite elements with zeros, and sum the tensor.
     is_finite = tf.is_finite(tensor)
-    if axis is None:
-        length = tf.reduce_sum(tf.ones_like(tensor, dtype=tf.int32))
-    elif axis == 0:
-        length = tensor_length(tensor)
-    else:
-        perm = [{0: axis, axis: 0}.get(i, i) for i in range(len(tensor.shape))]
-        length = tensor_length(tf.transpose(tensor, perm=perm))
-    n_obs = length - tf.reduce_sum(tf.cast(is_finite, tf.int32), axis=axis)
-    # Compute the sum of non-Nan elements across the reduction axis.
-    filled = tf.where(is_finite, tf.zeros_like(tensor), tensor)
+    filled = tf.where(is_finite, tensor, tf.zeros_like(tensor))
     sums = tf.reduce_sum(filled, axis=axis)
+    # Count the finite elements across the reduction axis.
+    n_obs = tf.reduce_sum(tf.cast(is_finite, tensor.dtype), axis=axis)
     # Retun the mean(s) across the reduction axis.
-    return sums / tf.cast(n_obs, tf.float32)
+    return sums / n_obs
 
 
-def run_along_first_dim(function, tensors, *args, **kwargs):
+def run_along_first_dim(
+        function, tensors, *args, results_dtype=None, **kwargs
+    ):
     """Apply a function along the first dimension of one or more tensors.
 
     This is useful when working on a variable-size tensor batching
     tensors which need transforming independently through the same
     operation.
 
-    function : function expecting one or more tensors of ranks {n}
-               and returning a tensor of rank m
-    tensors  : a tensor or tuple of tensors of ranks {n} + 1 along
-               whose first dimension `function` is to be applied
+    function      : function expecting one or more tensors of ranks {n}
+                    and returning a tensor of rank m
+    tensors       : a tensor or tuple of tensors of ranks {n} + 1 along
+                    whose first dimension `function` is to be applied
+    results_dtype : optional dtype of the function's results (keyword-only
+                    argument, by default that of the first input tensor)
 
     Return a tensor of rank m + 1, composed of the results of
     applying the function along the first dimension of the
@@ -231,29 +268,20 @@ def run_along_first_dim(function, tensors, *args, **kwargs):
             raise TypeError(
                 "'tensors' should be a sequence of tensorflow.Tensor objects."
             )
-    # Define functions to transform sub-tensors iteratively.
-    def run_function(iteration):
-        """Run the function on sub-tensor(s) of given index."""
-        nonlocal tensors, function, args, kwargs
-        units = tuple(tensor[iteration] for tensor in tensors)
-        return tf.expand_dims(function(*units, *args, **kwargs), 0)
-
-    def run_step(results, iteration):
-        """Run an iterative step."""
-        results = tf.concat([results, run_function(iteration)], axis=0)
-        return results, iteration + 1
-
-    # Gather the dimensions of the tensors and the results' rank.
-    size = tensor_length(tensors[0])
-    first = run_function(0)
-    results_shape = tf.TensorShape([None, *first.shape[1:]])
-    # Iteratively transform the sub-tensors along the first dimension.
-    results, _ = tf.while_loop(
-        cond=lambda _, iteration: tf.less(iteration, size), body=run_step,
-        loop_vars=[first, tf.constant(1, dtype=tf.int32)],
-        shape_invariants=[results_shape, tf.TensorShape([])]
+    # Define a function to transform sub-tensors.
+    def run_function(units):
+        """Run the function on a tuple of sub-tensors."""
+        nonlocal function, args, kwargs
+        return function(*units, *args, **kwargs)
+
+    if results_dtype is None:
+        results_dtype = tensors[0].dtype
+    # Transform the sub-tensors along the first dimension, stacking
+    # the results through a tensor array rather than concatenation.
+    return tf.map_fn(
+        run_function, tuple(tensors), dtype=results_dtype,
+        parallel_iterations=32
     )
-    return results
 
 
 def setup_activation_function(activation):
@@ -300,7 +328,4 @@ def sinc(tensor):
 
 def tensor_length(tensor):
     """Return a Tensor recording the length of another Tensor."""
-    sliced = tf.slice(
-        tensor, [0] * len(tensor.shape), [-1] + [1] * (len(tensor.shape) - 1)
-    )
-    return tf.reduce_sum(tf.ones_like(sliced, dtype=tf.int32))
+    return tf.shape(tensor)[0]
@@ -66,7 +66,7 @@ loss functions._
 
 
 Additionally, the `load_dumped_model` function allows to restore
-any model previously dumped to a .npy file using the `save_model`
+any model previously dumped to a .npz file using the `save_model`
 which is inherited from the abstract `NeuralNetwork` class.
 """
 
@@ -19,6 +19,7 @@
 
 """Abstract neural network class and dumped models loading function."""
 
+import hashlib
 from abc import ABCMeta, abstractmethod
 from collections import OrderedDict
 
@@ -30,6 +31,7 @@ from ac2art.internal.network_bricks import (
     build_layers_stack, refine_signal, validate_layer_config
 )
 from ac2art.internal.neural_layers import AbstractRNN, DenseLayer, SignalFilter
+from ac2art.internal.tf_utils import get_session_config
 from ac2art.utils import (
     check_positive_int, check_type_validity, instantiate, onetimemethod
 )
@@ -67,6 +69,11 @@ class NeuralNetwork(metaclass=ABCMeta):
                         (and should therefore not have delta counterparts)
         norm_params   : optional normalization parameters of the targets
                         (np.ndarray)
+
+        An existing tensorflow.Session may be passed as a 'session'
+        keyword argument. Otherwise, a session is opened, using the
+        tensorflow.ConfigProto passed as a 'session_config' keyword
+        argument, or that returned by `get_session_config` by default.
         """
         # Arguments serve modularity; pylint: disable=too-many-arguments
         # Record and process initialization arguments.
@@ -83,19 +90,35 @@ class NeuralNetwork(metaclass=ABCMeta):
         self.layers = OrderedDict()
         self.readouts = {}
         self.training_function = None
+        self._layers_cache = {}
+        self._restore_op = None
+        self._values_fetches = None
         # Build the network's tensorflow architecture.
         self._build_placeholders()
         self._build_hidden_layers()
         self._build_readout_layer()
         self._build_readouts()
         self._build_training_function()
+        # Cache layers-derived attributes, as layers are now set.
+        cached = (
+            'architecture', 'architecture_hash',
+            '_neural_weights', '_filter_cutoffs'
+        )
+        for name in cached:
+            self._layers_cache[name] = getattr(self, name)
+        # Set up the configuration of the network's own session(s).
+        session_config = kwargs.get('session_config')
+        if session_config is None:
+            session_config = get_session_config()
+        check_type_validity(session_config, tf.ConfigProto, 'session_config')
+        self._session_config = session_config
         # Assign a tensorflow session to the instance.
         if 'session' in kwargs.keys():
             session = kwargs['session']
             check_type_validity(session, tf.Session, 'session')
             self.session = session
         else:
-            self.session = tf.Session()
+            self.session = tf.Session(config=self._session_config)
             self.reset_model()
 
     def __getattr__(self, name):
@@ -105,31 +128,97 @@ class NeuralNetwork(metaclass=ABCMeta):
         name, the former will be the one returned by both `getattr` and the
         dot syntax.
         """
-        if not hasattr(self, '_init_arguments'):
+        # Exit early on special names, as well as before the arguments
+        # are recorded (e.g. when unpickling or copying the instance).
+        # note: `_init_arguments` is read from `__dict__` so as not to
+        #       recursively call `__getattr__`
+        init_arguments = self.__dict__.get('_init_arguments')
+        if init_arguments is None or name.startswith('__'):
             raise AttributeError(
                 "'%s' object has no attribute '%s'."
                 % (self.__class__.__name__, name)
             )
-        if name in self._init_arguments.keys():
-            return self._init_arguments[name]
-        raise AttributeError(
-            "'%s' object has no attribute '%s' nor initialization "
-            "argument of such name" % (self.__class__.__name__, name)
-        )
+        try:
+            return init_arguments[name]
+        except KeyError:
+            raise AttributeError(
+                "'%s' object has no attribute '%s' nor initialization "
+                "argument of such name" % (self.__class__.__name__, name)
+            )
 
     @property
     def architecture(self):
         """Dict describing the network's architecture."""
+        if 'architecture' in self._layers_cache:
+            return self._layers_cache['architecture']
         return OrderedDict([
             (name, layer.configuration) for name, layer in self.layers.items()
         ])
 
+    @property
+    def architecture_hash(self):
+        """Digest of the network's architecture's representation (str).
+
+        Unlike the built-in `hash` of strings, this digest is stable
+        across python sessions, hence may be stored in model dumps.
+        """
+        if 'architecture_hash' in self._layers_cache:
+            return self._layers_cache['architecture_hash']
+        return hashlib.sha1(repr(self.architecture).encode()).hexdigest()
+
     def get_values(self):
-        """Return the current values of the network's layers' parameters."""
-        return {
-            name: layer.get_values(self.session)
-            for name, layer in self.layers.items()
-        }
+        """Return the current values of the network's layers' parameters.
+
+        All values are fetched through a single session run.
+        """
+        # Set up the fetches' structure, if needed.
+        # note: a no-op is fetched (hence valued None) for missing biases
+        if self._values_fetches is None:
+            no_op = tf.no_op()
+            self._values_fetches = {
+                name: _replace_none(_get_layer_tensors(layer), no_op)
+                for name, layer in self.layers.items()
+            }
+        return self.session.run(self._values_fetches)
+
+    def _set_values(self, values):
+        """Assign values to the network's layers' parameters.
+
+        values : dict associating each layer's name with the values
+                 to assign to its parameters, as returned by the
+                 `get_values` method
+
+        All values are assigned through a single session run,
+        using a grouped assignment operation which is built once.
+        """
+        # Pair each variable with its value, checking values' conformity.
+        pairs = []
+        for name, layer in self.layers.items():
+            if name not in values.keys():
+                raise KeyError("Missing values for layer '%s'." % name)
+            try:
+                pairs.extend(
+                    _pair_values(_get_layer_tensors(layer), values[name])
+                )
+            except TypeError:
+                raise TypeError("Invalid values for layer '%s'." % name)
+        # Build the placeholders-fed assignment operation, if needed.
+        if self._restore_op is None:
+            holders = {
+                variable: tf.placeholder(
+                    variable.dtype.base_dtype, variable.shape
+                )
+                for variable, _ in pairs
+            }
+            assign = tf.group(*[
+                tf.assign(variable, holder)
+                for variable, holder in holders.items()
+            ])
+            self._restore_op = (holders, assign)
+        # Assign all values at once.
+        holders, assign = self._restore_op
+        feed_dict = {holders[variable]: value for variable, value in pairs}
+        self.session.run(assign, feed_dict)
 
     def get_weights(self, layer_name):
         """Return the tensor(s) of weights of a layer of given name."""
@@ -143,14 +232,18 @@ class NeuralNetwork(metaclass=ABCMeta):
     @property
     def _neural_weights(self):
         """Return the weight and biases tensors of all neural layers."""
+        if '_neural_weights' in self._layers_cache:
+            return self._layers_cache['_neural_weights']
         return [
-            self.get_weights(name) for name, layer in self.layers.items()
-            if isinstance(layer, (AbstractRNN, DenseLayer))
+            tensor for layer in self.layers.values()
+            for tensor in layer.trainable_tensors()
         ]
 
     @property
     def _filter_cutoffs(self):
         """Return the cutoff tensors of all learnable filter layers."""
+        if '_filter_cutoffs' in self._layers_cache:
+            return self._layers_cache['_filter_cutoffs']
         return [
             layer.cutoff for layer in self.layers.values()
             if isinstance(layer, SignalFilter) and layer.learnable
@@ -168,16 +261,27 @@ class NeuralNetwork(metaclass=ABCMeta):
         return self.init_arguments, None
 
     def save_model(self, filename):
-        """Save the network's configuration and current weights on disk."""
+        """Save the network's configuration and current weights on disk.
+
+        The model is dumped to a .npz archive, in which each weights
+        array is stored as such, while the rest of the configuration
+        is stored as a (small) pickled dict.
+
+        The archive is written to the exact given path, whatever its
+        extension (`numpy.savez` would otherwise append '.npz' to it).
+        """
         init_arguments, rebuild_init = self._adjust_init_arguments_for_saving()
+        arrays = {}
         model = {
             '__init__': init_arguments,
             '__class__': self.__module__ + '.' + self.__class__.__name__,
             '__rebuild_init__': rebuild_init,
             'architecture': self.architecture,
-            'values': self.get_values(),
+            'architecture_hash': self.architecture_hash,
+            'values': _extract_arrays(self.get_values(), 'values', arrays),
         }
-        np.save(filename, model)
+        with open(filename, 'wb') as file:
+            np.savez(file, __model__=model, **arrays)
 
     def restore_model(self, filename):
         """Restore the networks' weights from disk."""
@@ -187,13 +291,15 @@ class NeuralNetwork(metaclass=ABCMeta):
         """Reset the network's parameters. Optionally restart its session."""
         if restart_session:
             self.session.close()
-            self.session = tf.Session(self.session.sess_str)
+            self.session = tf.Session(
+                self.session.sess_str, config=self._session_config
+            )
         self.session.run(tf.global_variables_initializer())
 
     @property
     def _top_layer(self):
         """Return the layer on top of the network's architecture."""
-        return self.layers[list(self.layers.keys())[-1]]
+        return self.layers[next(reversed(self.layers))]
 
     def _interlace(self, main_tensor, binary_tensor):
         """Interlace tensors associated with continuous and binary targets."""
@@ -223,9 +329,12 @@ class NeuralNetwork(metaclass=ABCMeta):
         if self.input_shape[-1] is None:
             raise ValueError("Last 'input_shape' dimension must be fixed.")
         # Validate the model's layers configuration.
-        check_type_validity(self.layers_config, list, 'layers_config')
-        for i, config in enumerate(self.layers_config):
-            self.layers_config[i] = validate_layer_config(config)
+        # note: a new list is recorded, leaving the user's one untouched
+        layers_config = self._init_arguments['layers_config']
+        check_type_validity(layers_config, list, 'layers_config')
+        self._init_arguments['layers_config'] = [
+            validate_layer_config(config) for config in layers_config
+        ]
         # Validate the model's optional top layer configuration.
         if self.top_filter is not None:
             self._init_arguments['top_filter'] = (
@@ -272,7 +381,9 @@ class NeuralNetwork(metaclass=ABCMeta):
         self.holders['targets'] = tf.placeholder(
             tf.float32, [*self.input_shape[:-1], n_targets]
         )
-        self.holders['keep_prob'] = tf.placeholder(tf.float32, ())
+        # note: the keep probability defaults to 1, so that it need not
+        #       be fed when dropout is not used (e.g. at inference)
+        self.holders['keep_prob'] = tf.placeholder_with_default(1., ())
         if len(self.input_shape) == 3:
             self.holders['batch_sizes'] = (
                 tf.placeholder(tf.int32, [self.input_shape[0]])
@@ -370,17 +481,23 @@ class NeuralNetwork(metaclass=ABCMeta):
         targets    : optional true targets associated with the inputs
         keep_prob  : dropout keep-probability to use (default 1)
         """
-        # Build the basic feed dict.
-        feed_dict = {
-            self.holders['input']: input_data,
-            self.holders['keep_prob']: keep_prob
-        }
+        # Build the basic feed dict, feeding the keep probability only
+        # if it differs from its default value.
+        feed_dict = {self.holders['input']: input_data}
+        if keep_prob != 1:
+            feed_dict[self.holders['keep_prob']] = keep_prob
         # Alter data and update the feed dict when using batches of sequences.
+        # note: batches are built with the placeholders' float32 dtype,
+        #       which spares a conversion copy when running the session
         if len(self.input_shape) == 3:
             length = self.input_shape[1]
-            input_data, batch_sizes = sequences_to_batch(input_data, length)
+            input_data, batch_sizes = (
+                sequences_to_batch(input_data, length, dtype=np.float32)
+            )
             if targets is not None:
-                targets, _ = sequences_to_batch(targets, length)
+                targets, _ = (
+                    sequences_to_batch(targets, length, dtype=np.float32)
+                )
             feed_dict.update({
                 self.holders['input']: input_data,
                 self.holders['batch_sizes']: batch_sizes
@@ -425,15 +542,24 @@ class NeuralNetwork(metaclass=ABCMeta):
 
 
 def load_dumped_model(filename, model=None):
-    """Restore a neural network model from a .npy dump.
+    """Restore a neural network model from a .npz dump.
 
-    filename : path to a .npy file containing a model's configuration
+    filename : path to a .npz file containing a model's configuration
+               (dumps to .npy files from former versions are supported)
     model    : optional instantiated model whose weights to restore
                (default None, implying that a model is instantiated
                based on the dumped configuration and returned)
     """
     # Load the dumped model configuration and check its validity.
-    config = np.load(filename).tolist()
+    # note: pickling is explicitly allowed, as numpy >= 1.16.3 forbids it
+    #       by default, and the model's dict is unwrapped with `item`
+    dump = np.load(filename, allow_pickle=True)
+    if isinstance(dump, np.ndarray):
+        config = dump.item()
+    else:
+        with dump:
+            config = dump['__model__'].item()
+            config['values'] = _insert_arrays(config['values'], dump)
     check_type_validity(config, dict, 'loaded configuration')
     missing_keys = [
         key for key in
@@ -457,10 +583,101 @@ def load_dumped_model(filename, model=None):
         model, NeuralNetwork, 'rebuilt model' if new_model else 'model'
     )
     # Check that the model's architecture is coherent with the dump.
-    if model.architecture != config['architecture']:
+    # note: architectures are only compared in depth when their digests
+    #       differ (or are missing), as their representation might vary
+    same_hash = config.get('architecture_hash') == model.architecture_hash
+    if not same_hash and model.architecture != config['architecture']:
         raise TypeError("Invalid network architecture.")
     # Restore the model's weights.
-    for name, layer in model.layers.items():
-        layer.set_values(config['values'][name], model.session)
+    model._set_values(config['values'])  # pylint: disable=protected-access
     # If the model was instantiated within this function, return it.
     return model if new_model else None
+
+
+def _extract_arrays(values, key, arrays):
+    """Replace numpy arrays in a nested structure of values with str keys.
+
+    values : array, or list, tuple or dict of (nested) values
+    key    : key pointing to `values` in the `arrays` dict
+    arrays : dict to which extracted arrays are added in place
+    """
+    if isinstance(values, (np.ndarray, np.generic)):
+        arrays[key] = values
+        return key
+    if isinstance(values, dict):
+        return {
+            name: _extract_arrays(value, key + '/' + name, arrays)
+            for name, value in values.items()
+        }
+    if isinstance(values, (list, tuple)):
+        return type(values)(
+            _extract_arrays(value, key + '/%s' % i, arrays)
+            for i, value in enumerate(values)
+        )
+    return values
+
+
+def _insert_arrays(values, arrays):
+    """Replace str keys in a nested structure with associated arrays.
+
+    This is the inverse function of `_extract_arrays`.
+    """
+    if isinstance(values, str):
+        return arrays[values]
+    if isinstance(values, dict):
+        return {
+            name: _insert_arrays(value, arrays)
+            for name, value in values.items()
+        }
+    if isinstance(values, (list, tuple)):
+        return type(values)(_insert_arrays(value, arrays) for value in values)
+    return values
+
+
+def _get_layer_tensors(layer):
+    """Return the (nested) tensors recording a layer's parameters.
+
+    The returned structure matches that of the layer's values, as
+    returned by its `get_values` method and passed to `set_values`.
+    """
+    if isinstance(layer, SignalFilter):
+        return layer.cutoff
+    if isinstance(layer, DenseLayer):
+        return (layer.weights, layer.bias)
+    return layer.weights
+
+
+def _pair_values(tensors, values):
+    """Return a list of (variable, value) pairs out of matching structures.
+
+    tensors : tensor, None, or tuple or list of (nested) tensors
+    values  : matching structure of values
+
+    Non-variable tensors (e.g. fixed filters' cutoffs) and None
+    elements are left apart. Raise a TypeError if the structures
+    or the values' types do not match.
+    """
+    if isinstance(tensors, (list, tuple)):
+        conform = (
+            isinstance(values, type(tensors)) and len(values) == len(tensors)
+        )
+        if not conform:
+            raise TypeError('Mismatching values structure.')
+        return [
+            pair for tensor, value in zip(tensors, values)
+            for pair in _pair_values(tensor, value)
+        ]
+    if not isinstance(tensors, tf.Variable):
+        return []
+    if not isinstance(values, np.ndarray):
+        raise TypeError('Values should be numpy arrays.')
+    return [(tensors, values)]
+
+
+def _replace_none(tensors, default):
+    """Replace None elements of a (nested) structure of tensors."""
+    if isinstance(tensors, (list, tuple)):
+        return type(tensors)(
+            _replace_none(tensor, default) for tensor in tensors
+        )
+    return default if tensors is None else tensors
@@ -124,8 +124,9 @@ class AutoEncoder(MultilayerPerceptron):
             # Check the network's half's hidden layers' configuration.
             layers_config = self._init_arguments[half + '_config']
             check_type_validity(layers_config, list, half + '_config')
-            for i, config in enumerate(layers_config):
-                layers_config[i] = validate_layer_config(config)
+            self._init_arguments[half + '_config'] = [
+                validate_layer_config(config) for config in layers_config
+            ]
             # Check the network's half's top filter's configuration.
             top_filter = self._init_arguments[half + '_filter']
             if top_filter is not None:
@@ -165,7 +166,7 @@ class AutoEncoder(MultilayerPerceptron):
                 self.layers.pop('readout_layer_binary')
             )
         if self.encoder_filter:
-            for key in list(self.layers.keys())[::-1]:
+            for key in reversed(self.layers):
                 if key.startswith('top_filter'):
                     self.layers['encoder_top_filter'] = self.layers.pop(key)
                     break
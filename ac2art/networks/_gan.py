@@ -91,14 +91,15 @@ class GenerativeAdversarialNets(MultilayerPerceptron):
         # Validate arguments defining the generator network.
         super()._validate_args()
         # Validate the discriminator network's hidden layers config.
-        check_type_validity(self.discr_config, list, 'discr_config')
-        for i, config in enumerate(self.discr_config):
-            validated = validate_layer_config(config)
-            if isinstance(get_layer_class(validated[0]), SignalFilter):
+        discr_config = self._init_arguments['discr_config']
+        check_type_validity(discr_config, list, 'discr_config')
+        validated = [validate_layer_config(config) for config in discr_config]
+        for config in validated:
+            if issubclass(get_layer_class(config[0]), SignalFilter):
                 raise ValueError(
                     'Discrimnator layers may not contain signal filters.'
                 )
-            self.discr_config[i] = validated
+        self._init_arguments['discr_config'] = validated
 
     @onetimemethod
     def _build_hidden_layers(self):
@@ -180,16 +181,17 @@ class GenerativeAdversarialNets(MultilayerPerceptron):
         fit_discriminator = minimize_safely(
             self.optimizer, loss=discrim_loss,
             var_list=[
-                self.get_weights(name) for name in self.layers
+                tensor for name, layer in self.layers.items()
                 if name.startswith('discrim_')
+                for tensor in layer.trainable_tensors()
             ]
         )
         fit_generator = minimize_safely(
             self.optimizer, loss=generat_loss + (1 - discrim_loss),
             var_list=[
-                self.get_weights(name) for name, layer in self.layers.items()
+                tensor for name, layer in self.layers.items()
                 if not name.startswith('discrim_')
-                and not isinstance(layer, SignalFilter)
+                for tensor in layer.trainable_tensors()
             ]
         )
         # Add a function to optimize the generator's filter layer(s), if any.
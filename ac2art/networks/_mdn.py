@@ -155,9 +155,12 @@ class MixtureDensityNetwork(MultilayerPerceptron):
     def _build_likelihood_readouts(self):
         """Build wrappers computing the likelihood of the produced GMM."""
         # Define the network's likelihood.
+        # note: targets are normalized by a pre-inverted, float32 constant
         targets = (
             self.holders['targets'] if self.norm_params is None
-            else self.holders['targets'] / self.norm_params
+            else self.holders['targets'] * np.reciprocal(
+                self.norm_params.astype(np.float32)
+            )
         )
         self.readouts['likelihood'] = gaussian_mixture_density(
             tf.cast(targets, tf.float64), self.readouts['priors'],
@@ -93,6 +93,7 @@ class TrajectoryMDN(MixtureDensityNetwork):
         else:
             trajectory = run_along_first_dim(
                 mlpg_from_gaussian_mixture, tensors=parameters,
+                results_dtype=tf.float64,
                 weights=self.holders['_delta_weights']
             )
         self.readouts['raw_prediction'] = tf.cast(trajectory, tf.float32)
@@ -67,6 +67,9 @@ def check_batch_type(valid_type, **kwargs):
 
 def check_positive_int(instance, var_name):
     """Check that a given variable is a positive integer."""
+    # Spare further checks in the (most common) valid case.
+    if instance.__class__ is int and instance > 0:
+        return
     check_type_validity(instance, int, var_name)
     if instance <= 0:
         raise ValueError("'%s' must be positive." % var_name)
@@ -79,6 +82,12 @@ def check_type_validity(instance, valid_types, var_name):
     valid_types : expected type (or tuple of types)
     var_name    : variable name to use in the exception's message
     """
+    # Spare building types tuples when the instance's type is listed.
+    instance_type = type(instance)
+    if instance_type is valid_types or (
+            isinstance(valid_types, tuple) and instance_type in valid_types
+        ):
+        return
     if isinstance(valid_types, type):
         valid_types = (valid_types,)
     elif not isinstance(valid_types, tuple):
@@ -171,13 +180,24 @@ def instantiate(class_name, init_kwargs, rebuild_init=None):
     if rebuild_init is not None:
         for key, arguments in rebuild_init.items():
             init_kwargs[key] = instantiate(**arguments)
-    # Gather the class constructor of the object to instantiate.
-    module, name = class_name.rsplit('.', 1)
-    constructor = import_from_string(module, name)
+    # Gather the (cached) class constructor of the object to instantiate.
+    constructor = _import_class(class_name)
     # Instantiate the object and return it.
     return constructor(**init_kwargs)
 
 
+@functools.lru_cache(maxsize=128)
+def _import_class(class_name):
+    """Import and return a class based on its full module and class name.
+
+    Classes are cached, sparing repeated import lookups when
+    instantiating objects of the same classes (e.g. when restoring
+    multiple dumped models).
+    """
+    module, name = class_name.rsplit('.', 1)
+    return import_from_string(module, name)
+
+
 def onetimemethod(method):
     """Decorator for methods which need to be executable only once."""
     if not inspect.isfunction(method):
@@ -45,7 +45,7 @@ setuptools.setup(
     description='acoustic-to-articulatory inversion using neural networks',
     license='GPLv3',
     install_requires=[
-        'h5features >= 1.2',
+        'h5features >= 1.3.2',
         'numpy >= 1.12',
         'pandas >= 0.20',
         'scipy >= 1.0',